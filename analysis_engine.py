@@ -1,17 +1,81 @@
+import ast
+import json
+import os
+import pickle
+import shutil
 import subprocess
+import sys
 import tempfile
-from dataclasses import dataclass
-from typing import List, Optional, Tuple
-
-import black
-from radon.complexity import cc_visit, cc_rank
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from importlib import import_module
+from importlib.metadata import PackageNotFoundError, version
+from operator import attrgetter
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Tuple
+
+import xxhash
+
+# black, flake8 and radon are imported on first use (see `_import_once`) so
+# that importing this module (and starting the Streamlit app) stays cheap.
+if TYPE_CHECKING:
+    import black
+
+# Modules imported by `_import_once`. Their imports are serialized because the
+# app's warm-up thread and an analysis can import the same module at once, and
+# a thread can then see a partially initialized (mypyc-compiled) black.
+_IMPORTED_MODULES: Dict[str, ModuleType] = {}
+_IMPORT_LOCK = threading.Lock()
+
+# Name flake8 reports for the in-memory source (used for per-file-ignores).
+_FLAKE8_DISPLAY_NAME = "input.py"
+
+# On-disk cache of analysis results shared across restarts and workers.
+_DISK_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "aicodereviewer",
+)
+_DISK_CACHE_MAX_ENTRIES = 256
+# Bump whenever AnalysisResult or the analysis logic changes, so results
+# pickled by an older version are never loaded.
+_CACHE_FORMAT_VERSION = 4
+
+# In-process cache in front of the disk cache, most recently used last.
+_MEMORY_CACHE: "OrderedDict[str, AnalysisResult]" = OrderedDict()
+_MEMORY_CACHE_MAX_ENTRIES = 32
+_MEMORY_CACHE_LOCK = threading.Lock()
+
+# ruff options approximating flake8's defaults: pycodestyle (E/W, whose
+# E1/E2/E3 checks are still preview rules in ruff) and pyflakes (F) at
+# flake8's 79-column limit, minus the codes in flake8's default ignore list
+# that ruff implements (it rejects the others, e.g. E121 and E704). Known
+# differences remain: ruff reports E302/E305 around one-line `def`/`class`
+# statements, which flake8 exempts, and words messages and some columns
+# differently. ruff also implements none of pycodestyle's E12x
+# continuation-line checks (E124, E125, E127, E128, E129, E131, ...), so
+# misaligned hanging indents such as `def f(a,\n    b):` go unreported.
+# --isolated ignores pyproject.toml/ruff.toml, so results do not depend on
+# the working directory. --exit-zero makes any non-zero exit an error.
+_RUFF_ARGS = (
+    "check",
+    "--isolated",
+    "--output-format=json",
+    "--exit-zero",
+    "--preview",
+    "--select=E,F,W",
+    "--ignore=E226,E241,E242",
+    "--line-length=79",
+)
 
 
 class AnalysisError(Exception):
     """Raised when any of the analysis stages fails in an unrecoverable way."""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Flake8Issue:
     line: int
     col: int
@@ -19,16 +83,17 @@ class Flake8Issue:
     message: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ComplexityBlock:
     name: str
     lineno: int
     complexity: int
     rank: str
     block_type: str  # e.g. "function", "class", "method"
+    is_high: bool = False  # rank C or worse
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AnalysisResult:
     original_code: str
     formatted_code: str
@@ -36,95 +101,200 @@ class AnalysisResult:
     complexity_blocks: List[ComplexityBlock]
     high_complexity_blocks: List[ComplexityBlock]
     average_complexity: Optional[float]
+    formatting_changed: bool
     flake8_error: Optional[str] = None
+    # True when the code does not parse and black/radon were skipped.
+    syntax_error: bool = False
+    # Which backend produced `flake8_issues`: "ruff" or "flake8".
+    linter: str = "flake8"
+
+
+def _import_once(name: str) -> ModuleType:
+    """Import a lazily loaded module, at most one thread at a time."""
+    module = _IMPORTED_MODULES.get(name)
+    if module is None:
+        with _IMPORT_LOCK:
+            module = _IMPORTED_MODULES.get(name)
+            if module is None:
+                module = import_module(name)
+                _IMPORTED_MODULES[name] = module
+    return module
+
+
+@lru_cache(maxsize=1)
+def _black_mode() -> "black.FileMode":
+    """black's default mode; it is immutable, so one instance serves every call."""
+    return _import_once("black").FileMode()
+
+
+def _prime_black() -> "black.FileMode":
+    """Format a trivial snippet once so black's parser setup is paid up front."""
+    black = _import_once("black")
+    mode = _black_mode()
+    try:
+        black.format_str("pass\n", mode=mode)
+    except Exception:  # pragma: no cover - warm-up is best effort
+        pass
+    return mode
 
 
 def _run_black(code: str) -> str:
     """Format code using black's Python API."""
+    black = _import_once("black")
     try:
-        mode = black.FileMode()
-        return black.format_str(code, mode=mode)
+        return black.format_str(code, mode=_black_mode())
     except Exception as exc:  # pragma: no cover - extremely rare
         raise AnalysisError(f"black formatting failed: {exc}") from exc
 
 
-def _run_flake8(code: str) -> Tuple[List[Flake8Issue], Optional[str]]:
+def warm_up() -> None:
+    """
+    Pay black's and flake8's one-time initialization cost ahead of the first
+    analysis (e.g. from a long-lived server process).
+    """
+    _prime_black()
+    if _ruff_executable() is None:
+        _import_once("flake8_runner").make_app()
+
+
+def _run_flake8(
+    code: str, tree: Optional[ast.Module] = None
+) -> Tuple[List[Flake8Issue], Optional[str]]:
     """
-    Run flake8 via subprocess on a temporary file and parse its output.
+    Run flake8 in-process on the given source and collect its issues.
+
+    If `tree` is given it is used instead of re-parsing the source.
 
     Returns (issues, error_message). error_message is None on success.
     """
-    issues: List[Flake8Issue] = []
-    error_message: Optional[str] = None
+    flake8_runner = _import_once("flake8_runner")
+    return flake8_runner.run_flake8(code, _FLAKE8_DISPLAY_NAME, tree)
+
 
-    with tempfile.NamedTemporaryFile(
-        mode="w",
-        suffix=".py",
-        delete=False,
-        encoding="utf-8",
-    ) as tmp:
-        tmp.write(code)
-        tmp_path = tmp.name
+@lru_cache(maxsize=1)
+def _ruff_executable() -> Optional[str]:
+    """Path of the ruff binary, or None if ruff is not installed."""
+    return shutil.which("ruff")
 
+
+def _invoke_ruff(
+    ruff: str, args: List[str], stdin: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Run `ruff check` with the shared options and decode its JSON diagnostics.
+
+    Returns (diagnostics, error_message). error_message is None on success.
+    """
     try:
-        # --format string -> path:line:col: code message
         result = subprocess.run(
-            ["flake8", "--format=%(path)s:%(row)d:%(col)d: %(code)s %(text)s", tmp_path],
+            [ruff, *_RUFF_ARGS, *args],
+            input=stdin,
             capture_output=True,
             text=True,
             check=False,
         )
-    except FileNotFoundError:
-        # flake8 not installed or not in PATH
-        return [], "flake8 is not installed or not found in PATH. Install it via `pip install flake8`."
-
-    if result.returncode not in (0, 1):
-        # 0: no issues; 1: issues; other: error
-        error_message = (
-            f"flake8 execution failed with return code {result.returncode}: {result.stderr.strip()}"
+    except OSError as exc:
+        return [], f"ruff could not be started: {exc}"
+
+    if result.returncode != 0:
+        return [], (
+            f"ruff execution failed with return code {result.returncode}: "
+            f"{result.stderr.strip()}"
         )
-        return [], error_message
 
-    for line in result.stdout.splitlines():
-        # Format: /tmp/tmpxyz.py:line:col: CODE message...
-        try:
-            _, rest = line.split(":", 1)
-            line_part, col_part, rest2 = rest.split(":", 2)
-            line_no = int(line_part.strip())
-            col_no = int(col_part.strip())
-            rest2 = rest2.strip()
-            code_part, msg_part = rest2.split(" ", 1)
-            issues.append(
-                Flake8Issue(
-                    line=line_no,
-                    col=col_no,
-                    code=code_part.strip(),
-                    message=msg_part.strip(),
-                )
-            )
-        except ValueError:
-            # If parsing fails, treat the whole line as a message on line 0
-            issues.append(
-                Flake8Issue(
-                    line=0,
-                    col=0,
-                    code="UNKNOWN",
-                    message=line.strip(),
-                )
-            )
+    return json.loads(result.stdout), None
+
+
+def _ruff_issue(item: Dict[str, Any]) -> Flake8Issue:
+    return Flake8Issue(
+        line=item["location"]["row"],
+        col=item["location"]["column"],
+        # ruff reports syntax errors without a rule code
+        code=item["code"] or "E999",
+        message=item["message"],
+    )
+
+
+def _run_ruff(ruff: str, code: str) -> Tuple[List[Flake8Issue], Optional[str]]:
+    """
+    Run ruff on the given source via stdin.
+
+    Returns (issues, error_message). error_message is None on success.
+    """
+    diagnostics, error_message = _invoke_ruff(
+        ruff, [f"--stdin-filename={_FLAKE8_DISPLAY_NAME}", "-"], stdin=code
+    )
+    return [_ruff_issue(item) for item in diagnostics], error_message
+
+
+def _run_ruff_many(
+    ruff: str, codes: List[str]
+) -> List[Tuple[List[Flake8Issue], Optional[str]]]:
+    """
+    Lint several sources with a single ruff invocation.
 
-    return issues, error_message
+    ruff only reads one file from stdin, so the sources are written to a
+    temporary directory as `<index>.py` and mapped back by file name. The
+    shared `_RUFF_ARGS` include --isolated, so config files above that
+    directory are ignored and results match `_run_ruff`'s.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for index, code in enumerate(codes):
+            with open(
+                os.path.join(tmp_dir, f"{index}.py"), "w", encoding="utf-8"
+            ) as tmp:
+                tmp.write(code)
+        diagnostics, error_message = _invoke_ruff(ruff, [tmp_dir])
+
+    results: List[Tuple[List[Flake8Issue], Optional[str]]] = [
+        ([], error_message) for _ in codes
+    ]
+    for item in diagnostics:
+        index = int(os.path.splitext(os.path.basename(item["filename"]))[0])
+        results[index][0].append(_ruff_issue(item))
+    return results
+
+
+def _linter_name() -> str:
+    """Name of the lint backend `_run_linter` uses, for labelling results."""
+    return "ruff" if _ruff_executable() is not None else "flake8"
 
 
-def _run_radon_complexity(code: str) -> Tuple[List[ComplexityBlock], Optional[float]]:
+def _run_linter(
+    code: str, tree: Optional[ast.Module] = None
+) -> Tuple[List[Flake8Issue], Optional[str]]:
+    """
+    Lint the source with ruff when it is installed, otherwise with flake8.
+
+    ruff implements the same E/W/F rule codes in native code, so its issues
+    fit `Flake8Issue` unchanged. `tree` is only used by the flake8 fallback.
+
+    Returns (issues, error_message). error_message is None on success.
+    """
+    ruff = _ruff_executable()
+    if ruff is not None:
+        return _run_ruff(ruff, code)
+    return _run_flake8(code, tree)
+
+
+def _run_radon_complexity(
+    code: str, tree: Optional[ast.Module] = None
+) -> Tuple[List[ComplexityBlock], Optional[float]]:
     """
     Use radon's Python API to get cyclomatic complexity per block (function/method/class).
 
+    If `tree` is given it is visited directly instead of re-parsing the source.
+
     Returns (blocks, average_complexity).
     """
+    radon_complexity = _import_once("radon.complexity")
+
     blocks: List[ComplexityBlock] = []
     try:
-        radon_blocks = cc_visit(code)
+        if tree is not None:
+            radon_blocks = radon_complexity.cc_visit_ast(tree)
+        else:
+            radon_blocks = radon_complexity.cc_visit(code)
     except Exception as exc:  # pragma: no cover - defensive
         raise AnalysisError(f"radon complexity analysis failed: {exc}") from exc
 
@@ -136,13 +306,16 @@ def _run_radon_complexity(code: str) -> Tuple[List[ComplexityBlock], Optional[fl
         comp_value = float(b.complexity)
         total_complexity += comp_value
         block_type = getattr(b, "entity", None) or b.__class__.__name__.lower()
+        # cc_rank already returns an uppercase rank "A".."F"
+        rank = radon_complexity.cc_rank(comp_value)
         blocks.append(
             ComplexityBlock(
                 name=b.name,
                 lineno=b.lineno,
                 complexity=int(comp_value),
-                rank=cc_rank(comp_value),
+                rank=rank,
                 block_type=block_type,
+                is_high=rank >= "C",
             )
         )
 
@@ -153,35 +326,65 @@ def _run_radon_complexity(code: str) -> Tuple[List[ComplexityBlock], Optional[fl
         avg_complexity = None
 
     # Sort by complexity descending
-    blocks.sort(key=lambda blk: blk.complexity, reverse=True)
+    blocks.sort(key=attrgetter("complexity"), reverse=True)
 
     return blocks, avg_complexity
 
 
-def analyze_code(code: str) -> AnalysisResult:
+def _parse_shared_tree(code: str) -> Optional[ast.Module]:
     """
-    Run all analyses (black, flake8, radon) and return a structured result.
+    Parse code once for the lint and complexity stages.
 
-    This function is the main entry point for the Streamlit app.
+    SyntaxError propagates to the caller. Returns None for other input
+    ast.parse rejects (e.g. null bytes) so each stage reports it itself.
     """
-    if not isinstance(code, str):
-        raise AnalysisError("Code must be a string.")
-
-    original_code = code
-
-    # 1. Formatting (black)
-    formatted_code = _run_black(original_code)
+    try:
+        return ast.parse(code)
+    except ValueError:
+        return None
+    except (RecursionError, MemoryError) as exc:
+        # Raised by the parser for deeply nested expressions.
+        raise AnalysisError(
+            f"parsing failed ({type(exc).__name__}): the code is nested too "
+            "deeply to analyze."
+        ) from exc
+
+
+def _syntax_error_result(code: str, exc: SyntaxError) -> AnalysisResult:
+    """
+    Build the result for unparseable code: just the E999 flake8 would report.
 
-    # 2. Linting (flake8)
-    flake8_issues, flake8_error = _run_flake8(original_code)
+    black and radon are not run, so the result is marked with `syntax_error`.
+    """
+    issue = Flake8Issue(
+        line=exc.lineno or 1,
+        # SyntaxError offsets are 1-based; flake8 reports them shifted by one
+        col=(exc.offset or 0) + 1,
+        code="E999",
+        message=f"{type(exc).__name__}: {exc.msg}",
+    )
+    return AnalysisResult(
+        original_code=code,
+        formatted_code=code,
+        flake8_issues=[issue],
+        complexity_blocks=[],
+        high_complexity_blocks=[],
+        average_complexity=None,
+        formatting_changed=False,
+        syntax_error=True,
+        linter=_linter_name(),
+    )
 
-    # 3. Complexity (radon)
-    complexity_blocks, average_complexity = _run_radon_complexity(original_code)
 
-    # High complexity: rank C or worse
-    high_complexity_blocks = [
-        blk for blk in complexity_blocks if blk.rank.upper() >= "C"
-    ]
+def _assemble_result(
+    original_code: str,
+    formatted_code: str,
+    flake8_issues: List[Flake8Issue],
+    flake8_error: Optional[str],
+    complexity_blocks: List[ComplexityBlock],
+    average_complexity: Optional[float],
+) -> AnalysisResult:
+    high_complexity_blocks = [blk for blk in complexity_blocks if blk.is_high]
 
     return AnalysisResult(
         original_code=original_code,
@@ -190,5 +393,221 @@ def analyze_code(code: str) -> AnalysisResult:
         complexity_blocks=complexity_blocks,
         high_complexity_blocks=high_complexity_blocks,
         average_complexity=average_complexity,
+        formatting_changed=formatted_code.strip() != original_code.strip(),
         flake8_error=flake8_error,
+        linter=_linter_name(),
     )
+
+
+def analyze_code(code: str) -> AnalysisResult:
+    """
+    Run all analyses (black, ruff/flake8, radon) and return a structured result.
+
+    This function is the main entry point for the Streamlit app.
+    """
+    if not isinstance(code, str):
+        raise AnalysisError("Code must be a string.")
+
+    original_code = code
+
+    # Parse once and share the tree with flake8 and radon (black uses its own
+    # blib2to3 parser, so it cannot reuse it).
+    try:
+        tree = _parse_shared_tree(original_code)
+    except SyntaxError as exc:
+        # black would fail and flake8 would only report E999, so skip them.
+        return _syntax_error_result(original_code, exc)
+
+    # The three stages are independent, so run formatting (black), linting
+    # (ruff or flake8) and complexity (radon) side by side. Exceptions raised in a
+    # stage (e.g. AnalysisError) propagate from `.result()`.
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        black_future = executor.submit(_run_black, original_code)
+        lint_future = executor.submit(_run_linter, original_code, tree)
+        radon_future = executor.submit(
+            _run_radon_complexity, original_code, tree
+        )
+
+        formatted_code = black_future.result()
+        flake8_issues, flake8_error = lint_future.result()
+        complexity_blocks, average_complexity = radon_future.result()
+
+    return _assemble_result(
+        original_code,
+        formatted_code,
+        flake8_issues,
+        flake8_error,
+        complexity_blocks,
+        average_complexity,
+    )
+
+
+def _analyze_without_lint(code: str) -> AnalysisResult:
+    """
+    Run the black and radon stages for one source, leaving lint results empty.
+
+    Module-level so `analyze_codes` can run it in worker processes. Source that
+    does not parse gets the E999-only result, as in `analyze_code`.
+    """
+    try:
+        tree = _parse_shared_tree(code)
+    except SyntaxError as exc:
+        return _syntax_error_result(code, exc)
+
+    complexity_blocks, average_complexity = _run_radon_complexity(code, tree)
+    return _assemble_result(
+        code, _run_black(code), [], None, complexity_blocks, average_complexity
+    )
+
+
+def analyze_codes(sources: Mapping[str, str]) -> Dict[str, AnalysisResult]:
+    """
+    Analyze many sources at once, e.g. every file of a project.
+
+    `sources` maps a name (such as a file path) to its code; the result maps the
+    same names to their `AnalysisResult`. black and radon run in a process pool
+    while the parent lints everything with one ruff run (or the shared flake8
+    Application), so per-tool start-up is paid once rather than per file.
+    """
+    names = list(sources)
+    codes = [sources[name] for name in names]
+    if not all(isinstance(code, str) for code in codes):
+        raise AnalysisError("Code must be a string.")
+
+    with ProcessPoolExecutor() as executor:
+        # map() submits every source up front, so linting below overlaps with
+        # the workers.
+        local_results = executor.map(_analyze_without_lint, codes, chunksize=8)
+
+        ruff = _ruff_executable()
+        if ruff is not None:
+            lint_results = _run_ruff_many(ruff, codes)
+        else:
+            lint_results = [_run_flake8(code) for code in codes]
+
+        results: Dict[str, AnalysisResult] = {}
+        for name, result, (issues, error) in zip(names, local_results, lint_results):
+            if not result.syntax_error:
+                # Syntax-error results already carry their E999 issue.
+                result = replace(result, flake8_issues=issues, flake8_error=error)
+            results[name] = result
+
+    return results
+
+
+@lru_cache(maxsize=1)
+def _analyzer_fingerprint() -> bytes:
+    """Tool versions and options that affect results, mixed into cache keys."""
+
+    def installed_version(package: str) -> Optional[str]:
+        # flake8 and its checkers are only needed when ruff is missing.
+        try:
+            return version(package)
+        except PackageNotFoundError:
+            return None
+
+    ruff = _ruff_executable()
+    try:
+        # The binary's mtime changes whenever ruff is upgraded.
+        ruff_stamp = os.stat(ruff).st_mtime_ns if ruff is not None else None
+    except OSError:
+        ruff_stamp = None
+    return repr(
+        (
+            _CACHE_FORMAT_VERSION,
+            # Decides whether ast.parse accepts the code (E999 short-circuit).
+            sys.version_info[:2],
+            installed_version("black"),
+            installed_version("flake8"),
+            installed_version("pycodestyle"),
+            installed_version("pyflakes"),
+            installed_version("radon"),
+            _RUFF_ARGS,
+            ruff,
+            ruff_stamp,
+        )
+    ).encode("utf-8")
+
+
+def _disk_cache_path(code: str) -> str:
+    hasher = xxhash.xxh3_64(_analyzer_fingerprint())
+    hasher.update(code.encode("utf-8", "surrogatepass"))
+    return os.path.join(_DISK_CACHE_DIR, f"{hasher.hexdigest()}.pkl")
+
+
+def _load_cached_result(path: str) -> Optional[AnalysisResult]:
+    try:
+        with open(path, "rb") as cache_file:
+            result = pickle.load(cache_file)
+        # Mark as recently used for eviction.
+        os.utime(path)
+    except Exception:
+        # Missing, unreadable or written by an incompatible version.
+        return None
+    return result if isinstance(result, AnalysisResult) else None
+
+
+def _store_cached_result(path: str, result: AnalysisResult) -> None:
+    try:
+        os.makedirs(_DISK_CACHE_DIR, exist_ok=True)
+        # Write then rename so concurrent readers never see a partial file.
+        fd, tmp_path = tempfile.mkstemp(dir=_DISK_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as tmp:
+            pickle.dump(result, tmp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        _evict_cached_results()
+    except OSError:
+        # The cache is an optimization only; e.g. a read-only home is fine.
+        pass
+
+
+def _evict_cached_results() -> None:
+    """Drop the least recently used entries beyond `_DISK_CACHE_MAX_ENTRIES`."""
+    entries = [
+        entry
+        for entry in os.scandir(_DISK_CACHE_DIR)
+        if entry.name.endswith(".pkl")
+    ]
+    if len(entries) <= _DISK_CACHE_MAX_ENTRIES:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_atime)
+    for entry in entries[: len(entries) - _DISK_CACHE_MAX_ENTRIES]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def analyze_code_cached(code: str) -> AnalysisResult:
+    """
+    Memoized variant of `analyze_code`.
+
+    Results are kept in memory and pickled under `_DISK_CACHE_DIR` (keyed by an
+    xxhash of the source and the tool versions), so identical source is served
+    instantly, even after a restart or from another server worker. Results with
+    a linter error are not cached, so a transient failure is retried next time.
+    The returned object is shared between callers and must not be mutated.
+    """
+    if not isinstance(code, str):
+        raise AnalysisError("Code must be a string.")
+
+    with _MEMORY_CACHE_LOCK:
+        result = _MEMORY_CACHE.get(code)
+        if result is not None:
+            _MEMORY_CACHE.move_to_end(code)
+            return result
+
+    path = _disk_cache_path(code)
+    result = _load_cached_result(path)
+    if result is None:
+        result = analyze_code(code)
+        if result.flake8_error is not None:
+            return result
+        _store_cached_result(path, result)
+
+    with _MEMORY_CACHE_LOCK:
+        _MEMORY_CACHE[code] = result
+        _MEMORY_CACHE.move_to_end(code)
+        if len(_MEMORY_CACHE) > _MEMORY_CACHE_MAX_ENTRIES:
+            _MEMORY_CACHE.popitem(last=False)
+    return result
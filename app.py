@@ -1,9 +1,40 @@
+import threading
+from typing import Dict, List
+
 import streamlit as st
 
-from analysis_engine import analyze_code, AnalysisError
+from analysis_engine import (
+    analyze_code_cached,
+    warm_up,
+    AnalysisError,
+    ComplexityBlock,
+)
 from report_generator import generate_markdown_report
 
 
+@st.cache_resource(show_spinner=False)
+def _warm_up_analyzers() -> threading.Thread:
+    """
+    Initialize black and flake8 once per Streamlit server process.
+
+    Runs in a background thread so the page renders while the tools load.
+    """
+    thread = threading.Thread(target=warm_up, name="analyzer-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def _complexity_columns(blocks: List[ComplexityBlock]) -> Dict[str, list]:
+    """Build the complexity table column by column rather than row by row."""
+    return {
+        "Name": [block.name for block in blocks],
+        "Type": [block.block_type for block in blocks],
+        "Line": [block.lineno for block in blocks],
+        "Complexity": [block.complexity for block in blocks],
+        "Rank": [block.rank for block in blocks],
+    }
+
+
 def main() -> None:
     st.set_page_config(
         page_title="AI Code Reviewer (Python)",
@@ -11,9 +42,12 @@ def main() -> None:
         layout="wide",
     )
 
+    # Start paying tool start-up cost before the user clicks "Run Analysis".
+    _warm_up_analyzers()
+
     st.title("🧠 AI Code Reviewer for Python")
     st.write(
-        "Upload or paste Python code to automatically analyze it with **flake8**, "
+        "Upload or paste Python code to automatically analyze it with **ruff**/**flake8**, "
         "**black**, and **radon**. Get linting, formatting suggestions, and "
         "complexity insights with a downloadable report."
     )
@@ -65,18 +99,22 @@ def main() -> None:
             except UnicodeDecodeError:
                 code_to_analyze = file_bytes.decode("latin-1")
 
-        with st.spinner("Running flake8, black, and radon analyses..."):
+        with st.spinner("Running linting, black, and radon analyses..."):
             try:
-                analysis_result = analyze_code(code_to_analyze)
+                # Cached in memory and on disk by the engine (not st.cache_data, which
+                # could not skip results with a transient linter error).
+                analysis_result = analyze_code_cached(code_to_analyze)
             except AnalysisError as exc:
                 st.error(f"Analysis failed: {exc}")
                 return
 
         # Build report text once, reuse for display & download
         report_markdown = generate_markdown_report(analysis_result)
+        # "ruff" or "flake8", whichever backend produced the lint results
+        linter = analysis_result.linter
 
         summary_tab, lint_tab, format_tab, complexity_tab, report_tab = st.tabs(
-            ["Summary", "Linting (flake8)", "Formatting (black)", "Complexity (radon)", "Full Report"]
+            ["Summary", f"Linting ({linter})", "Formatting (black)", "Complexity (radon)", "Full Report"]
         )
 
         # --- Summary tab ---
@@ -86,7 +124,7 @@ def main() -> None:
             col1, col2, col3 = st.columns(3)
             with col1:
                 st.metric(
-                    "Flake8 issues",
+                    f"{linter.capitalize()} issues",
                     len(analysis_result.flake8_issues),
                 )
             with col2:
@@ -98,34 +136,38 @@ def main() -> None:
                 else:
                     st.metric("Average complexity", "N/A")
             with col3:
-                changed = (
-                    analysis_result.formatted_code.strip()
-                    != analysis_result.original_code.strip()
-                )
-                st.metric("Formatting changes", "Yes" if changed else "No")
+                if analysis_result.syntax_error:
+                    st.metric("Formatting changes", "N/A")
+                else:
+                    st.metric(
+                        "Formatting changes",
+                        "Yes" if analysis_result.formatting_changed else "No",
+                    )
 
             st.markdown("### Key Improvement Areas")
             if not analysis_result.flake8_issues and not analysis_result.high_complexity_blocks:
                 st.success(
-                    "No flake8 issues found and all functions/classes have low complexity. "
+                    f"No {linter} issues found and all functions/classes have low complexity. "
                     "Your code looks clean and maintainable."
                 )
             else:
                 bullets = []
                 if analysis_result.flake8_issues:
                     bullets.append(
-                        f"- **{len(analysis_result.flake8_issues)} flake8 issues** detected "
+                        f"- **{len(analysis_result.flake8_issues)} {linter} issues** detected "
                         "(style, quality, or possible bugs)."
                     )
+                if analysis_result.syntax_error:
+                    bullets.append(
+                        "- **The code does not parse**, so black and radon were skipped. "
+                        "Fix the syntax error first."
+                    )
                 if analysis_result.high_complexity_blocks:
                     bullets.append(
                         f"- **{len(analysis_result.high_complexity_blocks)} high-complexity blocks** "
                         "(rank C or worse) that may be harder to maintain or test."
                     )
-                if (
-                    analysis_result.formatted_code.strip()
-                    != analysis_result.original_code.strip()
-                ):
+                if analysis_result.formatting_changed:
                     bullets.append(
                         "- **Formatting changes recommended** by black (consistent style, spacing, and line length)."
                     )
@@ -148,27 +190,28 @@ def main() -> None:
                     data=analysis_result.formatted_code.encode("utf-8"),
                     file_name="formatted_code.py",
                     mime="text/x-python",
+                    disabled=analysis_result.syntax_error,
                 )
 
         # --- Linting tab ---
         with lint_tab:
-            st.subheader("flake8 Linting Results")
-            if not analysis_result.flake8_issues:
-                st.success("No flake8 issues found.")
+            st.subheader(f"{linter} Linting Results")
+            if analysis_result.flake8_error:
+                st.warning(f"{linter} reported an error while running: {analysis_result.flake8_error}")
+            elif not analysis_result.flake8_issues:
+                st.success(f"No {linter} issues found.")
             else:
                 st.info(
                     "Each issue includes line/column, error code, and a short description."
                 )
-                lint_rows = [
-                    {
-                        "Line": issue.line,
-                        "Column": issue.col,
-                        "Code": issue.code,
-                        "Message": issue.message,
-                    }
-                    for issue in analysis_result.flake8_issues
-                ]
-                st.dataframe(lint_rows, use_container_width=True)
+                issues = analysis_result.flake8_issues
+                lint_columns = {
+                    "Line": [issue.line for issue in issues],
+                    "Column": [issue.col for issue in issues],
+                    "Code": [issue.code for issue in issues],
+                    "Message": [issue.message for issue in issues],
+                }
+                st.dataframe(lint_columns, use_container_width=True)
 
         # --- Formatting tab ---
         with format_tab:
@@ -182,12 +225,17 @@ def main() -> None:
 
             with col_after:
                 st.caption("Formatted by black")
-                st.code(analysis_result.formatted_code, language="python")
+                if analysis_result.syntax_error:
+                    st.info("Not available: the code does not parse.")
+                else:
+                    st.code(analysis_result.formatted_code, language="python")
 
-            if (
-                analysis_result.formatted_code.strip()
-                == analysis_result.original_code.strip()
-            ):
+            if analysis_result.syntax_error:
+                st.error(
+                    "black was skipped because the code does not parse. Fix the syntax "
+                    "error shown in the Linting tab first."
+                )
+            elif not analysis_result.formatting_changed:
                 st.success("black did not change the code – it is already well formatted.")
             else:
                 st.warning(
@@ -199,37 +247,28 @@ def main() -> None:
         with complexity_tab:
             st.subheader("Complexity Analysis (radon)")
 
-            if not analysis_result.complexity_blocks:
+            if analysis_result.syntax_error:
+                st.error(
+                    "radon was skipped because the code does not parse. Fix the syntax "
+                    "error shown in the Linting tab first."
+                )
+            elif not analysis_result.complexity_blocks:
                 st.info("No functions, methods, or classes were detected for complexity analysis.")
             else:
                 st.markdown("#### All blocks (sorted by complexity)")
-                rows = [
-                    {
-                        "Name": block.name,
-                        "Type": block.block_type,
-                        "Line": block.lineno,
-                        "Complexity": block.complexity,
-                        "Rank": block.rank,
-                    }
-                    for block in analysis_result.complexity_blocks
-                ]
-                st.dataframe(rows, use_container_width=True)
+                st.dataframe(
+                    _complexity_columns(analysis_result.complexity_blocks),
+                    use_container_width=True,
+                )
 
                 st.markdown("#### High-complexity blocks (rank C or worse)")
                 if not analysis_result.high_complexity_blocks:
                     st.success("No high-complexity blocks detected (rank C or worse).")
                 else:
-                    high_rows = [
-                        {
-                            "Name": block.name,
-                            "Type": block.block_type,
-                            "Line": block.lineno,
-                            "Complexity": block.complexity,
-                            "Rank": block.rank,
-                        }
-                        for block in analysis_result.high_complexity_blocks
-                    ]
-                    st.dataframe(high_rows, use_container_width=True)
+                    st.dataframe(
+                        _complexity_columns(analysis_result.high_complexity_blocks),
+                        use_container_width=True,
+                    )
 
         # --- Full report tab ---
         with report_tab:
@@ -0,0 +1,127 @@
+"""
+In-process flake8 backend for `analysis_engine`.
+
+Kept in its own module so that importing `analysis_engine` does not pull in
+flake8 and its plugins until flake8 is actually used.
+"""
+import ast
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from flake8.checker import FileChecker
+from flake8.exceptions import ExecutionError
+from flake8.formatting.base import BaseFormatter
+from flake8.main.application import Application
+from flake8.processor import FileProcessor
+from flake8.style_guide import StyleGuideManager
+from flake8.violation import Violation
+
+from analysis_engine import Flake8Issue
+
+
+class _CollectingFormatter(BaseFormatter):
+    """flake8 formatter that records violations instead of printing them."""
+
+    def after_init(self) -> None:
+        self.issues: List[Flake8Issue] = []
+
+    def handle(self, error: Violation) -> None:
+        self.issues.append(
+            Flake8Issue(
+                line=error.line_number,
+                col=error.column_number,
+                code=error.code,
+                message=error.text,
+            )
+        )
+
+    def format(self, error: Violation) -> Optional[str]:
+        return None
+
+
+class _SourceFileProcessor(FileProcessor):
+    """flake8 processor that can reuse an already parsed module."""
+
+    def __init__(self, *args, tree: Optional[ast.Module] = None, **kwargs) -> None:
+        self._tree = tree
+        super().__init__(*args, **kwargs)
+
+    def build_ast(self) -> ast.AST:
+        if self._tree is not None:
+            return self._tree
+        return super().build_ast()
+
+
+class _SourceFileChecker(FileChecker):
+    """flake8 file checker that reads its source from memory instead of disk."""
+
+    def __init__(
+        self, *, lines: List[str], tree: Optional[ast.Module] = None, **kwargs
+    ) -> None:
+        self._lines = lines
+        self._tree = tree
+        super().__init__(**kwargs)
+
+    def _make_processor(self) -> FileProcessor:
+        return _SourceFileProcessor(
+            self.filename, self.options, lines=self._lines, tree=self._tree
+        )
+
+
+@lru_cache(maxsize=1)
+def make_app() -> Application:
+    """
+    Build a flake8 Application once per process.
+
+    Plugin discovery and option/config parsing are the expensive part of a
+    flake8 run, so they are done here and shared by every `run_flake8` call.
+    --isolated ignores setup.cfg/tox.ini/.flake8, so results (and the cache
+    keyed on them) do not depend on the working directory.
+    """
+    app = Application()
+    app.initialize(["--isolated"])
+    return app
+
+
+def run_flake8(
+    code: str, filename: str, tree: Optional[ast.Module] = None
+) -> Tuple[List[Flake8Issue], Optional[str]]:
+    """
+    Run flake8 in-process on the given source and collect its issues.
+
+    `filename` is the name flake8 reports (and matches per-file-ignores
+    against). If `tree` is given it is used instead of re-parsing the source.
+
+    Returns (issues, error_message). error_message is None on success.
+    """
+    app = make_app()
+    checker = _SourceFileChecker(
+        filename=filename,
+        plugins=app.plugins.checkers,
+        options=app.options,
+        lines=code.splitlines(keepends=True),
+        tree=tree,
+    )
+
+    try:
+        _, results, _ = checker.run_checks()
+    except ExecutionError as exc:
+        return [], f"flake8 execution failed: {exc}"
+
+    # A fresh style guide per run keeps select/ignore/noqa handling identical
+    # to the CLI without accumulating statistics on the shared Application.
+    formatter = _CollectingFormatter(app.options)
+    guide = StyleGuideManager(app.options, formatter)
+    results.sort(key=lambda res: (res[1], res[2]))
+    with guide.processing_file(filename):
+        for error_code, line_no, col_no, text, physical_line in results:
+            guide.handle_error(
+                code=error_code,
+                filename=filename,
+                line_number=line_no,
+                column_number=col_no,
+                text=text,
+                physical_line=physical_line,
+            )
+
+    return formatter.issues, None
@@ -1,163 +1,140 @@
-from typing import List
+from typing import Iterator, List
 
 from analysis_engine import AnalysisResult, Flake8Issue, ComplexityBlock
 
 
-def _format_flake8_section(issues: List[Flake8Issue]) -> str:
+def _format_flake8_section(issues: List[Flake8Issue], linter: str) -> Iterator[str]:
     if not issues:
-        return "No flake8 issues were detected.\n"
+        yield f"No {linter} issues were detected.\n"
+        return
 
-    lines = [
-        "| Line | Col | Code | Message |",
-        "| ---- | --- | ---- | ------- |",
-    ]
+    yield "| Line | Col | Code | Message |"
+    yield "| ---- | --- | ---- | ------- |"
     for issue in issues:
-        lines.append(
-            f"| {issue.line} | {issue.col} | `{issue.code}` | {issue.message} |"
-        )
-    return "\n".join(lines) + "\n"
+        yield f"| {issue.line} | {issue.col} | `{issue.code}` | {issue.message} |"
+    yield ""
 
 
-def _format_complexity_section(blocks: List[ComplexityBlock]) -> str:
+def _format_complexity_section(blocks: List[ComplexityBlock]) -> Iterator[str]:
     if not blocks:
-        return "No functions, methods, or classes were found for complexity analysis.\n"
+        yield "No functions, methods, or classes were found for complexity analysis.\n"
+        return
 
-    lines = [
-        "| Name | Type | Line | Complexity | Rank |",
-        "| ---- | ---- | ---- | ---------- | ---- |",
-    ]
+    yield "| Name | Type | Line | Complexity | Rank |"
+    yield "| ---- | ---- | ---- | ---------- | ---- |"
     for blk in blocks:
-        lines.append(
-            f"| `{blk.name}` | {blk.block_type} | {blk.lineno} | {blk.complexity} | {blk.rank} |"
-        )
-    return "\n".join(lines) + "\n"
-
-
-def _format_high_complexity_section(blocks: List[ComplexityBlock]) -> str:
-    high = [blk for blk in blocks if blk.rank.upper() >= "C"]
-    if not high:
-        return "No high-complexity blocks (rank C or worse) were detected.\n"
-
-    lines = [
-        "The following blocks are considered **high-complexity** (rank C or worse):\n",
-        "| Name | Type | Line | Complexity | Rank |",
-        "| ---- | ---- | ---- | ---------- | ---- |",
-    ]
-    for blk in high:
-        lines.append(
-            f"| `{blk.name}` | {blk.block_type} | {blk.lineno} | {blk.complexity} | {blk.rank} |"
-        )
-    return "\n".join(lines) + "\n"
+        yield f"| `{blk.name}` | {blk.block_type} | {blk.lineno} | {blk.complexity} | {blk.rank} |"
+    yield ""
+
+
+def _format_high_complexity_section(high_blocks: List[ComplexityBlock]) -> Iterator[str]:
+    if not high_blocks:
+        yield "No high-complexity blocks (rank C or worse) were detected.\n"
+        return
 
+    yield "The following blocks are considered **high-complexity** (rank C or worse):\n"
+    yield "| Name | Type | Line | Complexity | Rank |"
+    yield "| ---- | ---- | ---- | ---------- | ---- |"
+    for blk in high_blocks:
+        yield f"| `{blk.name}` | {blk.block_type} | {blk.lineno} | {blk.complexity} | {blk.rank} |"
+    yield ""
 
-def _summary_bullets(result: AnalysisResult) -> str:
-    bullets = []
 
+def _summary_bullets(result: AnalysisResult) -> Iterator[str]:
     if result.flake8_issues:
-        bullets.append(
-            f"- **{len(result.flake8_issues)} flake8 issues** detected. "
+        yield (
+            f"- **{len(result.flake8_issues)} {result.linter} issues** detected. "
             "These include style violations, potential bugs, and readability problems."
         )
     else:
-        bullets.append(
-            "- No flake8 issues were detected. The code adheres to common style guidelines."
+        yield f"- No {result.linter} issues were detected. The code adheres to common style guidelines."
+
+    if result.syntax_error:
+        yield (
+            "- **black and radon were skipped** because the code does not parse. "
+            f"Fix the syntax error reported by {result.linter} first."
         )
+        return
 
     if result.average_complexity is not None:
-        bullets.append(
+        yield (
             f"- **Average cyclomatic complexity** per analyzed block is "
             f"**{result.average_complexity:.2f}**."
         )
     else:
-        bullets.append(
-            "- No functions, methods, or classes were found for complexity analysis."
-        )
+        yield "- No functions, methods, or classes were found for complexity analysis."
 
     if result.high_complexity_blocks:
-        bullets.append(
+        yield (
             f"- **{len(result.high_complexity_blocks)} high-complexity blocks** "
             "(rank C or worse) were detected. Consider refactoring these into "
             "smaller, more focused functions or simplifying conditional logic."
         )
     else:
-        bullets.append(
-            "- No high-complexity blocks (rank C or worse) were found; complexity levels look healthy."
-        )
+        yield "- No high-complexity blocks (rank C or worse) were found; complexity levels look healthy."
 
-    if (
-        result.formatted_code.strip()
-        != result.original_code.strip()
-    ):
-        bullets.append(
+    if result.formatting_changed:
+        yield (
             "- **black suggested formatting changes**. Adopting the formatted version will "
             "improve consistency, readability, and maintainability across the codebase."
         )
     else:
-        bullets.append(
-            "- The code is already formatted consistently according to black's defaults."
-        )
+        yield "- The code is already formatted consistently according to black's defaults."
 
-    return "\n".join(bullets)
-
-
-def generate_markdown_report(result: AnalysisResult) -> str:
-    """
-    Build a full Markdown report summarizing the analysis.
-
-    This is used both for on-screen display and for the downloadable report file.
-    """
-    lines: List[str] = []
 
-    lines.append("# Python Code Analysis Report\n")
+def _report_lines(result: AnalysisResult) -> Iterator[str]:
+    yield "# Python Code Analysis Report\n"
 
-    lines.append("## 1. High-Level Summary\n")
-    lines.append(_summary_bullets(result))
-    lines.append("")
+    yield "## 1. High-Level Summary\n"
+    yield from _summary_bullets(result)
+    yield ""
 
-    lines.append("## 2. Linting (flake8)\n")
+    yield f"## 2. Linting ({result.linter})\n"
     if result.flake8_error:
-        lines.append("> flake8 reported an error while running:\n")
-        lines.append(f"> {result.flake8_error}\n")
-    lines.append(_format_flake8_section(result.flake8_issues))
-    lines.append("")
-
-    lines.append("## 3. Formatting (black)\n")
-    changed = result.formatted_code.strip() != result.original_code.strip()
-    if changed:
-        lines.append(
-            "black reformatted the code. The suggested formatted version is shown below.\n"
-        )
+        yield f"> {result.linter} reported an error while running:\n"
+        yield f"> {result.flake8_error}\n"
+    yield from _format_flake8_section(result.flake8_issues, result.linter)
+    yield ""
+
+    yield "## 3. Formatting (black)\n"
+    if result.syntax_error:
+        yield "black was skipped because the code does not parse.\n"
+    elif result.formatting_changed:
+        yield "black reformatted the code. The suggested formatted version is shown below.\n"
     else:
-        lines.append("black made no changes; the code is already well formatted.\n")
-
-    lines.append("### 3.1 Original Code\n")
-    lines.append("```python")
-    lines.append(result.original_code.rstrip())
-    lines.append("```")
-    lines.append("")
-
-    lines.append("### 3.2 Formatted Code (black)\n")
-    lines.append("```python")
-    lines.append(result.formatted_code.rstrip())
-    lines.append("```")
-    lines.append("")
-
-    lines.append("## 4. Complexity Analysis (radon)\n")
-    if result.average_complexity is not None:
-        lines.append(
-            f"- **Average complexity per block**: `{result.average_complexity:.2f}`\n"
-        )
-    lines.append("### 4.1 All Analyzed Blocks\n")
-    lines.append(_format_complexity_section(result.complexity_blocks))
-    lines.append("")
-
-    lines.append("### 4.2 High-Complexity Blocks (Rank C or Worse)\n")
-    lines.append(_format_high_complexity_section(result.complexity_blocks))
-    lines.append("")
-
-    lines.append("## 5. Recommended Improvements\n")
-    lines.append(
-        "- Address flake8 issues in order of severity (e.g., potential bugs and "
+        yield "black made no changes; the code is already well formatted.\n"
+
+    yield "### 3.1 Original Code\n"
+    yield "```python"
+    yield result.original_code.rstrip()
+    yield "```"
+    yield ""
+
+    if not result.syntax_error:
+        yield "### 3.2 Formatted Code (black)\n"
+        yield "```python"
+        yield result.formatted_code.rstrip()
+        yield "```"
+        yield ""
+
+    yield "## 4. Complexity Analysis (radon)\n"
+    if result.syntax_error:
+        yield "radon was skipped because the code does not parse.\n"
+        yield ""
+    else:
+        if result.average_complexity is not None:
+            yield f"- **Average complexity per block**: `{result.average_complexity:.2f}`\n"
+        yield "### 4.1 All Analyzed Blocks\n"
+        yield from _format_complexity_section(result.complexity_blocks)
+        yield ""
+
+        yield "### 4.2 High-Complexity Blocks (Rank C or Worse)\n"
+        yield from _format_high_complexity_section(result.high_complexity_blocks)
+        yield ""
+
+    yield "## 5. Recommended Improvements\n"
+    yield (
+        f"- Address {result.linter} issues in order of severity (e.g., potential bugs and "
         "undefined variables first, then style and readability issues).\n"
         "- For high-complexity blocks, consider:\n"
         "  - Extracting helper functions to reduce the amount of logic in a single block.\n"
@@ -167,4 +144,12 @@ def generate_markdown_report(result: AnalysisResult) -> str:
         "your project.\n"
     )
 
-    return "\n".join(lines).strip() + "\n"
+
+def generate_markdown_report(result: AnalysisResult) -> str:
+    """
+    Build a full Markdown report summarizing the analysis.
+
+    This is used both for on-screen display and for the downloadable report file.
+    The report is produced line by line and joined exactly once.
+    """
+    return "\n".join(_report_lines(result))